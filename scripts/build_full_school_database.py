@@ -10,11 +10,42 @@ import requests
 import argparse
 import sys
 import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+from build_school_code_index import build_index as build_code_index, write_index as write_code_index
+from build_school_name_index import build_index as build_name_index, write_index as write_name_index
+
+# Read code columns as text so pandas doesn't turn "001131" into 1131.0
+CODE_DTYPES = {'CEEB Code': str, 'CEEB': str, 'Federal School Code': str}
+
 # Federal School Code List URL (US Dept of Education)
 FEDERAL_SCHOOL_CODE_URL = "https://studentaid.gov/sites/default/files/fsawg/datacenter/library/SchoolCodeList.xlsx"
 
+def map_federal_codes(df):
+    """Map Federal School Code List rows to our schema"""
+    # Typical columns: School Code, School Name, Address, City, State, Zip, Country
+    schools = []
+    
+    for _, row in df.iterrows():
+        school = {
+            'School Name': row.get('School Name', row.get('SchoolName', '')),
+            'Type': 'University',  # Federal codes are for postsecondary
+            'City': row.get('City', ''),
+            'State': row.get('State', ''),
+            'Country': row.get('Country', 'USA'),
+            'CEEB Code': '',  # Will be added if available
+            'Federal School Code': str(row.get('School Code', row.get('SchoolCode', ''))),
+            'Website': '',  # Not in federal list
+            'Notes': 'Federal Title IV Institution'
+        }
+        schools.append(school)
+    
+    return pd.DataFrame(schools)
+
 def download_federal_codes(output_csv):
     """Download and parse Federal School Code List from US Dept of Education"""
     print("📥 Downloading Federal School Code List from US Department of Education...")
@@ -41,25 +72,7 @@ def download_federal_codes(output_csv):
         print(f"📊 Found {len(df)} institutions in Federal School Code List")
         
         # Map columns to our schema
-        # Typical columns: School Code, School Name, Address, City, State, Zip, Country
-        schools = []
-        
-        for _, row in df.iterrows():
-            school = {
-                'School Name': row.get('School Name', row.get('SchoolName', '')),
-                'Type': 'University',  # Federal codes are for postsecondary
-                'City': row.get('City', ''),
-                'State': row.get('State', ''),
-                'Country': row.get('Country', 'USA'),
-                'CEEB Code': '',  # Will be added if available
-                'Federal School Code': str(row.get('School Code', row.get('SchoolCode', ''))),
-                'Website': '',  # Not in federal list
-                'Notes': 'Federal Title IV Institution'
-            }
-            schools.append(school)
-        
-        # Create DataFrame
-        result_df = pd.DataFrame(schools)
+        result_df = map_federal_codes(df)
         
         # Remove duplicates
         result_df = result_df.drop_duplicates(subset=['School Name', 'City', 'State'])
@@ -84,17 +97,149 @@ def download_federal_codes(output_csv):
         print(f"❌ Error processing federal codes: {e}")
         return False
 
+def partition_file_name(position, state):
+    """Checkpoint file name for the state partition at this position in the output"""
+    label = '_blank' if state is None else re.sub(r'[^A-Za-z0-9]', '_', str(state))
+    return f"{position:03d}_{label}.csv"
+
+def split_by_state(df):
+    """
+    Split rows by the State value that ends up in the output, in the order
+    sort_values(['State', ...]) would give: states in order, blank (NaN) last.
+    Returns a list of (state, frame) with None standing in for blank.
+    """
+    if 'State' not in df:
+        return [('', df)]
+    
+    partitions = list(df[df['State'].notna()].groupby('State', sort=True))
+    blank = df[df['State'].isna()]
+    if len(blank):
+        partitions.append((None, blank))
+    return partitions
+
+def build_state_partition(state_df, partition_file):
+    """Map, dedup and sort one state's rows, then checkpoint them to disk"""
+    result_df = map_federal_codes(state_df)
+    
+    # State is part of the dedup key, so per-state dedup matches a global one
+    result_df = result_df.drop_duplicates(subset=['School Name', 'City', 'State'])
+    # Stable, like the multi-column sort in single-frame mode, so schools
+    # sharing a name stay in source order
+    result_df = result_df.sort_values(['School Name'], kind='stable')
+    
+    # Write then rename, so a partition file only exists once it is complete
+    temp_file = partition_file.with_suffix('.tmp')
+    result_df.to_csv(temp_file, index=False)
+    os.replace(temp_file, partition_file)
+    
+    return len(result_df)
+
+def download_federal_codes_partitioned(output_csv, checkpoint_dir, workers, fresh=False):
+    """
+    Build the federal school list one state at a time across a process pool.
+    Finished states are checkpointed in checkpoint_dir, so an interrupted run
+    picks up where it left off; the checkpoints are removed once the output
+    has been written. With fresh=True any old checkpoints are discarded first.
+    """
+    if fresh and checkpoint_dir.exists():
+        print(f"🧹 Clearing checkpoints in {checkpoint_dir}")
+        shutil.rmtree(checkpoint_dir)
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    source_file = checkpoint_dir / 'SchoolCodeList.xlsx'
+    
+    try:
+        # Keep the download with the checkpoints so a resumed run uses the same input
+        if source_file.exists():
+            age_hours = (time.time() - source_file.stat().st_mtime) / 3600
+            print(f"♻️  Resuming from checkpoints in {checkpoint_dir}")
+            print(f"   Spreadsheet downloaded {age_hours:.1f} hours ago (use --fresh to re-download)")
+        else:
+            print("📥 Downloading Federal School Code List from US Department of Education...")
+            print(f"   URL: {FEDERAL_SCHOOL_CODE_URL}")
+            response = requests.get(FEDERAL_SCHOOL_CODE_URL, timeout=30)
+            response.raise_for_status()
+            temp_file = source_file.with_suffix('.tmp')
+            with open(temp_file, 'wb') as f:
+                f.write(response.content)
+            os.replace(temp_file, source_file)
+        
+        print("📊 Parsing Excel file...")
+        df = pd.read_excel(source_file, sheet_name=0)
+        print(f"📊 Found {len(df)} institutions in Federal School Code List")
+        
+        # Split rows by state; the input is pinned above, so partition
+        # positions (and checkpoint names) are stable across resumed runs
+        partitions = split_by_state(df)
+        partition_files = [checkpoint_dir / partition_file_name(i, state)
+                           for i, (state, _) in enumerate(partitions)]
+        
+        pending = [i for i, partition_file in enumerate(partition_files) if not partition_file.exists()]
+        print(f"🗂️  {len(partitions)} state partitions, {len(partitions) - len(pending)} already checkpointed")
+        
+        failed = []
+        if pending:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(build_state_partition, partitions[i][1], partition_files[i]): i
+                    for i in pending
+                }
+                for future in as_completed(futures):
+                    state = partitions[futures[future]][0]
+                    label = '(no state)' if state is None else repr(state)
+                    try:
+                        count = future.result()
+                        print(f"   ✓ {label}: {count} schools")
+                    except Exception as e:
+                        print(f"   ❌ {label}: {e}")
+                        failed.append(state)
+        
+        if failed:
+            print(f"❌ {len(failed)} partition(s) failed. Re-run to retry them; finished states are kept.")
+            return False
+        
+        # Partitions are sorted by name within each state and listed in state
+        # order, so concatenating them gives the same order as sorting by
+        # (State, School Name)
+        total = 0
+        temp_output = Path(str(output_csv) + '.tmp')
+        with open(temp_output, 'w', newline='', encoding='utf-8') as out:
+            for i, partition_file in enumerate(partition_files):
+                with open(partition_file, 'r', encoding='utf-8') as f:
+                    header = f.readline()
+                    if i == 0:
+                        out.write(header)
+                    for line in f:
+                        out.write(line)
+                        total += 1
+        os.replace(temp_output, output_csv)
+        
+        shutil.rmtree(checkpoint_dir)
+        
+        print(f"✅ Wrote {total} schools to {output_csv}")
+        print(f"📍 States covered: {len([state for state, _ in partitions if state is not None])}")
+        
+        return True
+        
+    except requests.RequestException as e:
+        print(f"❌ Error downloading federal codes: {e}")
+        print("   The URL might have changed. Please check:")
+        print("   https://studentaid.gov/data-center/school/federal-school-codes")
+        return False
+    except Exception as e:
+        print(f"❌ Error processing federal codes: {e}")
+        return False
+
 def append_k12_data(k12_csv_path, output_csv):
     """Append K-12 CEEB data to existing school database"""
     print(f"📥 Loading K-12 data from {k12_csv_path}...")
     
     try:
         # Read existing data
-        existing_df = pd.read_csv(output_csv)
+        existing_df = pd.read_csv(output_csv, dtype=CODE_DTYPES)
         print(f"   Existing schools: {len(existing_df)}")
         
         # Read K-12 data
-        k12_df = pd.read_csv(k12_csv_path)
+        k12_df = pd.read_csv(k12_csv_path, dtype=CODE_DTYPES)
         print(f"   K-12 schools to add: {len(k12_df)}")
         
         # Map K-12 columns to our schema
@@ -143,6 +288,27 @@ def append_k12_data(k12_csv_path, output_csv):
         print(f"❌ Error appending K-12 data: {e}")
         return False
 
+def build_search_indexes(output_csv, data_dir):
+    """Rebuild the typo-tolerant name index and the CEEB / federal code index"""
+    try:
+        name_index_file = data_dir / 'school_name_index.json.gz'
+        print(f"\n🔤 Building school name index: {name_index_file}")
+        index = build_name_index(output_csv)
+        write_name_index(index, name_index_file)
+        print(f"✅ Indexed {len(index['tokens'])} name tokens")
+        
+        code_index_file = data_dir / 'school_codes.idx'
+        print(f"\n🔢 Building school code index: {code_index_file}")
+        records = build_code_index(output_csv)
+        write_code_index(records, code_index_file)
+        print(f"✅ Indexed {len(records)} codes")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error building search indexes: {e}")
+        return False
+
 def main():
     parser = argparse.ArgumentParser(
         description='Build comprehensive school database with CEEB and Federal codes',
@@ -157,6 +323,12 @@ Examples:
   
   # Do both
   python build_full_school_database.py --federal yes --k12 california_schools.csv
+  
+  # Build the federal list per state across all cores (resumable)
+  python build_full_school_database.py --federal yes --partitioned
+  
+  # Same, discarding checkpoints left by an earlier run
+  python build_full_school_database.py --federal yes --partitioned --fresh
         """
     )
     
@@ -164,9 +336,25 @@ Examples:
                        help='Download and process federal school codes')
     parser.add_argument('--k12', metavar='CSV_PATH',
                        help='Path to K-12 CEEB CSV to append')
+    parser.add_argument('--partitioned', action='store_true',
+                       help='Process federal codes per state in parallel, with checkpoints')
+    parser.add_argument('--workers', type=int,
+                       help='Worker processes for --partitioned (default: all cores)')
+    parser.add_argument('--fresh', action='store_true',
+                       help='Discard --partitioned checkpoints and re-download instead of resuming')
     
     args = parser.parse_args()
     
+    if args.partitioned and args.federal != 'yes':
+        print("❌ --partitioned only applies to --federal yes")
+        return 1
+    if args.workers is not None and not args.partitioned:
+        print("❌ --workers only applies with --partitioned")
+        return 1
+    if args.fresh and not args.partitioned:
+        print("❌ --fresh only applies with --partitioned")
+        return 1
+    
     # Determine output path
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
@@ -184,7 +372,13 @@ Examples:
     
     # Download federal codes if requested
     if args.federal == 'yes':
-        if not download_federal_codes(output_csv):
+        if args.partitioned:
+            checkpoint_dir = data_dir / '.federal_checkpoints'
+            workers = max(1, args.workers or os.cpu_count() or 1)
+            if not download_federal_codes_partitioned(output_csv, checkpoint_dir, workers,
+                                                      fresh=args.fresh):
+                success = False
+        elif not download_federal_codes(output_csv):
             success = False
     
     # Append K-12 data if provided
@@ -197,12 +391,16 @@ Examples:
         print("\n⚠️  No action specified. Use --federal yes or --k12 <path>")
         return 1
     
+    # Rebuild the search indexes for the new export
+    if success and not build_search_indexes(output_csv, data_dir):
+        success = False
+    
     if success:
         print("\n✅ School database build complete!")
         print(f"📁 Output: {output_csv}")
         print("\nNext steps:")
         print("  1. Review the CSV file")
-        print("  2. Load into database: python scripts/load_schools_to_db.py")
+        print("  2. Load into database: python scripts/load_schools_pipelined.py")
         print("  3. Test search API: curl http://localhost:3000/api/schools/search?q=stanford")
         return 0
     else:
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+School Code Index Builder
+Writes a sorted, fixed-width binary index of CEEB and federal school codes
+so exact code lookups need no database connection and no load-time parsing.
+
+File layout (big-endian):
+  header  - magic b'SCIX', version (H), record size (H), record count (I),
+            reserved (I)
+  records - sorted by (code, kind), RECORD_SIZE bytes each:
+            code   Q  normalized code as 8 ASCII bytes, NUL padded
+            kind   B  CODE_KIND_CEEB or CODE_KIND_FEDERAL
+            (3 pad bytes)
+            row    I  CSV row number (0-based, header excluded)
+            offset Q  byte offset of that row in the school CSV
+
+Codes are packed as big-endian integers so ordering matches byte order and
+the reader can compare keys with struct.unpack_from straight out of the
+memory map, without slicing.
+
+Output: data/school_codes.idx
+
+Usage:
+  python scripts/build_school_code_index.py
+  python scripts/build_school_code_index.py --lookup 052460
+"""
+
+import argparse
+import csv
+import io
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from pathlib import Path
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+DEFAULT_SCHOOLS_CSV = DATA_DIR / 'us_schools_ceeb_and_federal_codes_template.csv'
+DEFAULT_INDEX_FILE = DATA_DIR / 'school_codes.idx'
+
+INDEX_MAGIC = b'SCIX'
+INDEX_VERSION = 1
+
+HEADER = struct.Struct('>4sHHII')
+RECORD = struct.Struct('>QBxxxIQ')
+KEY = struct.Struct('>Q')
+RECORD_SIZE = RECORD.size
+
+CODE_WIDTH = 8
+
+CODE_KIND_CEEB = 1
+CODE_KIND_FEDERAL = 2
+
+_FLOAT_CODE = re.compile(r'^\d+\.0+$')
+
+CODE_COLUMNS = {
+    'CEEB Code': CODE_KIND_CEEB,
+    'Federal School Code': CODE_KIND_FEDERAL,
+}
+
+
+def normalize_code(code):
+    """
+    Normalize a CEEB/federal code: strip, uppercase, left-pad digits to 6.
+    Also undoes pandas round-trips, where codes come back as floats
+    ("1131.0") and blanks as "nan".
+    """
+    code = '' if code is None else str(code).strip().upper()
+    if code in ('NAN', 'NONE'):
+        return ''
+    if _FLOAT_CODE.match(code):
+        code = code.split('.', 1)[0]
+    if code.isdigit():
+        return code.zfill(6)
+    return code
+
+
+def encode_code(code):
+    """Pack a normalized code into its sortable integer key, or None if it can't fit"""
+    raw = code.encode('ascii', errors='ignore')
+    if not raw or len(raw) > CODE_WIDTH:
+        return None
+    return int.from_bytes(raw.ljust(CODE_WIDTH, b'\0'), 'big')
+
+
+def read_record(f):
+    """
+    Read one CSV record from a binary file. Quoted fields may contain
+    newlines, so keep reading lines until the quotes balance.
+    """
+    record = f.readline()
+    while record.count(b'"') % 2:
+        line = f.readline()
+        if not line:
+            break
+        record += line
+    return record
+
+
+def parse_record(record):
+    return next(csv.reader(io.StringIO(record.decode('utf-8'), newline='')), [])
+
+
+def iter_csv_rows(schools_csv):
+    """
+    Yield (row_number, byte_offset, row_dict) for each data row of the CSV.
+    Row numbers count records the way csv.DictReader does, and offsets
+    point at the start of each record.
+    """
+    with open(schools_csv, 'rb') as f:
+        header = parse_record(read_record(f))
+        offset = f.tell()
+        row_number = 0
+        for record in iter(lambda: read_record(f), b''):
+            values = parse_record(record)
+            if values:
+                yield row_number, offset, dict(zip(header, values))
+                row_number += 1
+            offset += len(record)
+
+
+def build_index(schools_csv):
+    """Collect and sort (key, kind, row, offset) records from the school CSV"""
+    records = []
+    for row_number, offset, row in iter_csv_rows(schools_csv):
+        for column, kind in CODE_COLUMNS.items():
+            key = encode_code(normalize_code(row.get(column)))
+            if key is not None:
+                records.append((key, kind, row_number, offset))
+    records.sort()
+    return records
+
+
+def write_index(records, output_file):
+    """
+    Write the sorted records as a fixed-width binary file. The file is
+    written alongside and renamed into place, so readers that already have
+    the old index mapped keep seeing it intact.
+    """
+    temp_file = f"{output_file}.tmp"
+    with open(temp_file, 'wb') as f:
+        f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, RECORD_SIZE, len(records), 0))
+        for record in records:
+            f.write(RECORD.pack(*record))
+    os.replace(temp_file, output_file)
+
+
+class SchoolCodeIndex:
+    """Memory-mapped reader doing binary search over the code index"""
+
+    def __init__(self, index_file=DEFAULT_INDEX_FILE):
+        self._file = open(index_file, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, count, _ = HEADER.unpack_from(self._map, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError(f"Not a school code index (v{INDEX_VERSION}): {index_file}")
+        self.count = count
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _lower_bound(self, key):
+        lo, hi = 0, self.count
+        data, start, unpack = self._map, HEADER.size, KEY.unpack_from
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if unpack(data, start + mid * RECORD_SIZE)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def lookup(self, code, kind=None):
+        """
+        Return [(kind, row_number, byte_offset)] for every school with this
+        code, optionally restricted to CODE_KIND_CEEB or CODE_KIND_FEDERAL.
+        """
+        key = encode_code(normalize_code(code))
+        if key is None:
+            return []
+        matches = []
+        position = HEADER.size + self._lower_bound(key) * RECORD_SIZE
+        end = HEADER.size + self.count * RECORD_SIZE
+        while position < end:
+            record_key, record_kind, row_number, offset = RECORD.unpack_from(self._map, position)
+            if record_key != key:
+                break
+            if kind is None or record_kind == kind:
+                matches.append((record_kind, row_number, offset))
+            position += RECORD_SIZE
+        return matches
+
+    def __contains__(self, code):
+        key = encode_code(normalize_code(code))
+        if key is None:
+            return False
+        i = self._lower_bound(key)
+        return i < self.count and KEY.unpack_from(self._map, HEADER.size + i * RECORD_SIZE)[0] == key
+
+
+def read_school_row(schools_csv, offset):
+    """Read the school row at a byte offset returned by SchoolCodeIndex.lookup"""
+    with open(schools_csv, 'rb') as f:
+        header = parse_record(read_record(f))
+        f.seek(offset)
+        values = parse_record(read_record(f))
+    return dict(zip(header, values))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Build the memory-mapped CEEB / federal code index',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Build from the national school CSV
+  python build_school_code_index.py
+
+  # Resolve a code using the built index
+  python build_school_code_index.py --lookup 052460
+        """
+    )
+
+    parser.add_argument('--input', metavar='CSV_PATH', default=str(DEFAULT_SCHOOLS_CSV),
+                       help='School CSV to index')
+    parser.add_argument('--output', metavar='INDEX_PATH', default=str(DEFAULT_INDEX_FILE),
+                       help='Where to write the index')
+    parser.add_argument('--lookup', metavar='CODE',
+                       help='Resolve a code in an existing index instead of building')
+
+    args = parser.parse_args()
+
+    if args.lookup:
+        with SchoolCodeIndex(args.output) as index:
+            start = time.perf_counter()
+            matches = index.lookup(args.lookup)
+            elapsed = (time.perf_counter() - start) * 1_000_000
+            print(f"🔎 {normalize_code(args.lookup)}: {len(matches)} match(es) ({elapsed:.1f} µs)")
+            for kind, row_number, offset in matches:
+                row = read_school_row(args.input, offset)
+                label = 'CEEB' if kind == CODE_KIND_CEEB else 'Federal'
+                print(f"   [{label}] {row.get('School Name')} ({row.get('City')}, {row.get('State')})")
+        return 0
+
+    print("🔢 School Code Index Builder")
+    print("=" * 60)
+    print(f"Input: {args.input}")
+
+    try:
+        records = build_index(args.input)
+    except FileNotFoundError:
+        print(f"❌ File not found: {args.input}")
+        return 1
+
+    write_index(records, args.output)
+
+    print(f"✅ Indexed {len(records)} codes ({RECORD_SIZE} bytes each)")
+    print(f"📁 Output: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+School Name Index Builder
+Precomputes a typo-tolerant index over school-name tokens so misspellings
+like "Stamford", "Berkly" or "Fullerten" can be corrected without
+scanning the schools table.
+
+The index is a SymSpell-style deletion dictionary: every name token is
+stored under all strings reachable by deleting up to MAX_DISTANCE
+characters from its first PREFIX_LENGTH characters. A query token is
+looked up the same way and candidates are confirmed with a real edit
+distance, so a lookup touches a few dozen dictionary keys at most.
+
+Output: data/school_name_index.json.gz
+  tokens    - distinct normalized name tokens
+  postings  - per token, the CSV row numbers (0-based, header excluded)
+              of schools whose name contains it
+  deletes   - delete string -> token ids
+
+Usage:
+  python scripts/build_school_name_index.py
+  python scripts/build_school_name_index.py --query "stamford"
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+DEFAULT_SCHOOLS_CSV = DATA_DIR / 'us_schools_ceeb_and_federal_codes_template.csv'
+DEFAULT_INDEX_FILE = DATA_DIR / 'school_name_index.json.gz'
+
+INDEX_VERSION = 1
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+
+# Tokens shorter than this are too ambiguous to correct ("of", "st")
+MIN_TOKEN_LENGTH = 3
+
+# Short tokens only get distance-1 corrections
+SHORT_TOKEN_LENGTH = 5
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_name(name):
+    """Lowercase, strip accents and punctuation, collapse whitespace"""
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(' ', name.lower()).strip()
+
+
+def tokenize(name):
+    """Split a school name into indexable tokens"""
+    return [t for t in normalize_name(name).split() if len(t) >= MIN_TOKEN_LENGTH]
+
+
+def generate_deletes(word, max_distance=MAX_DISTANCE, prefix_length=PREFIX_LENGTH):
+    """All strings reachable by deleting up to max_distance chars from the word's prefix"""
+    word = word[:prefix_length]
+    deletes = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for item in frontier:
+            if len(item) <= 1:
+                continue
+            for i in range(len(item)):
+                next_frontier.add(item[:i] + item[i + 1:])
+        next_frontier -= deletes
+        deletes |= next_frontier
+        frontier = next_frontier
+    return deletes
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance, or limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+def build_index(schools_csv):
+    """Build the index structure from the school CSV"""
+    token_ids = {}
+    tokens = []
+    postings = []
+
+    with open(schools_csv, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row_number, row in enumerate(reader):
+            for token in set(tokenize(row.get('School Name', ''))):
+                if token not in token_ids:
+                    token_ids[token] = len(tokens)
+                    tokens.append(token)
+                    postings.append([])
+                postings[token_ids[token]].append(row_number)
+
+    deletes = {}
+    for token_id, token in enumerate(tokens):
+        for delete in generate_deletes(token):
+            deletes.setdefault(delete, []).append(token_id)
+
+    return {
+        'version': INDEX_VERSION,
+        'max_distance': MAX_DISTANCE,
+        'prefix_length': PREFIX_LENGTH,
+        'tokens': tokens,
+        'postings': postings,
+        'deletes': deletes,
+    }
+
+
+def write_index(index, output_file):
+    """Write the index as compact gzipped JSON, replacing any old index atomically"""
+    temp_file = f"{output_file}.tmp"
+    with gzip.open(temp_file, 'wt', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(temp_file, output_file)
+
+
+class SchoolNameIndex:
+    """Loaded name index answering distance-1/2 token suggestions"""
+
+    def __init__(self, index):
+        if index.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version: {index.get('version')}")
+        self.max_distance = index['max_distance']
+        self.prefix_length = index['prefix_length']
+        self.tokens = index['tokens']
+        self.postings = index['postings']
+        self.deletes = index['deletes']
+        self.token_ids = {token: i for i, token in enumerate(self.tokens)}
+
+    @classmethod
+    def load(cls, index_file=DEFAULT_INDEX_FILE):
+        with gzip.open(index_file, 'rt', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def suggest(self, word, max_distance=None):
+        """
+        Return [(token, distance)] for indexed tokens within max_distance of
+        word, closest first. An exact match is returned alone.
+        """
+        word = normalize_name(word).replace(' ', '')
+        if len(word) < MIN_TOKEN_LENGTH:
+            return []
+        if word in self.token_ids:
+            return [(word, 0)]
+
+        if max_distance is None:
+            max_distance = 1 if len(word) <= SHORT_TOKEN_LENGTH else self.max_distance
+        max_distance = min(max_distance, self.max_distance)
+
+        candidates = set()
+        for delete in generate_deletes(word, max_distance, self.prefix_length):
+            candidates.update(self.deletes.get(delete, ()))
+
+        matches = []
+        for token_id in candidates:
+            token = self.tokens[token_id]
+            distance = edit_distance(word, token, max_distance)
+            if distance <= max_distance:
+                matches.append((token, distance))
+        matches.sort(key=lambda m: (m[1], -len(self.postings[self.token_ids[m[0]]]), m[0]))
+        return matches
+
+    def correct_query(self, query):
+        """Replace each query token with its best suggestion, if any"""
+        corrected = []
+        for word in normalize_name(query).split():
+            matches = self.suggest(word)
+            corrected.append(matches[0][0] if matches else word)
+        return ' '.join(corrected)
+
+    def rows_for_query(self, query):
+        """CSV row numbers of schools whose name matches every (corrected) token"""
+        rows = None
+        for word in normalize_name(query).split():
+            matches = self.suggest(word)
+            if not matches:
+                continue
+            best = matches[0][1]
+            token_rows = set()
+            for token, distance in matches:
+                if distance == best:
+                    token_rows.update(self.postings[self.token_ids[token]])
+            rows = token_rows if rows is None else rows & token_rows
+        return sorted(rows) if rows else []
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Build the typo-tolerant school name index',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Build from the national school CSV
+  python build_school_name_index.py
+
+  # Try a misspelled query against the built index
+  python build_school_name_index.py --query "berkly"
+        """
+    )
+
+    parser.add_argument('--input', metavar='CSV_PATH', default=str(DEFAULT_SCHOOLS_CSV),
+                       help='School CSV to index')
+    parser.add_argument('--output', metavar='INDEX_PATH', default=str(DEFAULT_INDEX_FILE),
+                       help='Where to write the index')
+    parser.add_argument('--query', metavar='TEXT',
+                       help='Look up a query in an existing index instead of building')
+
+    args = parser.parse_args()
+
+    if args.query:
+        index = SchoolNameIndex.load(args.output)
+        start = time.perf_counter()
+        corrected = index.correct_query(args.query)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"🔎 '{args.query}' -> '{corrected}' ({elapsed:.3f} ms)")
+        for word in normalize_name(args.query).split():
+            print(f"   {word}: {index.suggest(word)[:5]}")
+        return 0
+
+    print("🔤 School Name Index Builder")
+    print("=" * 60)
+    print(f"Input: {args.input}")
+
+    try:
+        index = build_index(args.input)
+    except FileNotFoundError:
+        print(f"❌ File not found: {args.input}")
+        return 1
+
+    write_index(index, args.output)
+
+    print(f"✅ Indexed {len(index['tokens'])} name tokens ({len(index['deletes'])} delete keys)")
+    print(f"📁 Output: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+SQLite-backed libSQL HTTP Stand-in
+Serves the subset of the Hrana v2 pipeline endpoint (POST /v2/pipeline)
+used by scripts/load_schools_pipelined.py, on top of a local SQLite file,
+so the loader can be tried without Turso or sqld.
+
+Supported requests: execute, batch (ok / not / and / or / error conditions)
+and close. Every pipeline gets its own connection; batons are not
+supported, so streams can't span HTTP requests.
+
+Usage:
+  python scripts/libsql_http_standin.py --db /tmp/schools.db --port 8080
+  python scripts/load_schools_pipelined.py --url http://127.0.0.1:8080
+"""
+
+import argparse
+import base64
+import json
+import sqlite3
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BUSY_TIMEOUT = 30.0
+
+
+def decode_value(value):
+    if value['type'] == 'null':
+        return None
+    if value['type'] == 'integer':
+        return int(value['value'])
+    if value['type'] == 'float':
+        return float(value['value'])
+    return value.get('value')
+
+
+def encode_value(value):
+    if value is None:
+        return {'type': 'null'}
+    if isinstance(value, int):
+        return {'type': 'integer', 'value': str(value)}
+    if isinstance(value, float):
+        return {'type': 'float', 'value': value}
+    if isinstance(value, bytes):
+        return {'type': 'blob', 'base64': base64.b64encode(value).decode('ascii')}
+    return {'type': 'text', 'value': value}
+
+
+def execute(conn, stmt):
+    """Run a Hrana statement and build its StmtResult"""
+    args = [decode_value(a) for a in stmt.get('args', [])]
+    cursor = conn.execute(stmt['sql'], args)
+    rows = cursor.fetchall()
+    return {
+        'cols': [{'name': c[0], 'decltype': None} for c in cursor.description or []],
+        'rows': [[encode_value(v) for v in row] for row in rows],
+        'affected_row_count': max(cursor.rowcount, 0),
+        'last_insert_rowid': str(cursor.lastrowid) if cursor.lastrowid else None,
+    }
+
+
+def evaluate(condition, results, errors):
+    kind = condition['type']
+    if kind == 'ok':
+        return results[condition['step']] is not None
+    if kind == 'error':
+        return errors[condition['step']] is not None
+    if kind == 'not':
+        return not evaluate(condition['cond'], results, errors)
+    if kind == 'and':
+        return all(evaluate(c, results, errors) for c in condition['conds'])
+    if kind == 'or':
+        return any(evaluate(c, results, errors) for c in condition['conds'])
+    raise ValueError(f"Unsupported condition type: {kind}")
+
+
+def run_batch(conn, steps):
+    results = [None] * len(steps)
+    errors = [None] * len(steps)
+    for i, step in enumerate(steps):
+        condition = step.get('condition')
+        if condition and not evaluate(condition, results, errors):
+            continue
+        try:
+            results[i] = execute(conn, step['stmt'])
+        except sqlite3.Error as e:
+            errors[i] = {'message': str(e)}
+    return {'step_results': results, 'step_errors': errors}
+
+
+def run_pipeline(db_path, requests):
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, isolation_level=None)
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        results = []
+        for request in requests:
+            try:
+                if request['type'] == 'execute':
+                    response = {'type': 'execute', 'result': execute(conn, request['stmt'])}
+                elif request['type'] == 'batch':
+                    response = {'type': 'batch', 'result': run_batch(conn, request['batch']['steps'])}
+                elif request['type'] == 'close':
+                    response = {'type': 'close'}
+                else:
+                    raise ValueError(f"Unsupported request type: {request['type']}")
+                results.append({'type': 'ok', 'response': response})
+            except (sqlite3.Error, ValueError) as e:
+                results.append({'type': 'error', 'error': {'message': str(e)}})
+        return results
+    finally:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        conn.close()
+
+
+def make_handler(db_path):
+    class PipelineHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != '/v2/pipeline':
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            payload = json.dumps({
+                'baton': None,
+                'base_url': None,
+                'results': run_pipeline(db_path, body.get('requests', [])),
+            }).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return PipelineHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite-backed libSQL HTTP stand-in')
+    parser.add_argument('--db', default='standin.db', help='SQLite database file')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.db))
+    print(f"🗄️  libSQL stand-in serving {args.db} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
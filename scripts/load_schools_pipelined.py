@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Pipelined School Loader
+Loads the school CSV into libSQL / Turso over the HTTP (Hrana v2 pipeline)
+protocol, replacing the one-batch-at-a-time scripts/load-schools-batch.js.
+
+- A pooled async HTTP client keeps several large batches in flight
+- Each batch runs in its own transaction (BEGIN IMMEDIATE ... COMMIT,
+  with ROLLBACK if any step fails)
+- Rows carry explicit ids and use INSERT OR REPLACE, so a retried batch
+  whose first attempt did commit doesn't duplicate rows
+- Rows go into a shadow table which is swapped in with a single
+  transaction at the end, so search never sees a half-empty table; any
+  batch that still fails after retries aborts the load before the swap
+
+Row ids are the CSV row number + 1, so they line up with the row numbers
+in the name index (build_school_name_index.py) and code index
+(build_school_code_index.py) built from the same CSV.
+
+Works against Turso, a local sqld (http://127.0.0.1:8080) or the SQLite
+stand-in in scripts/libsql_http_standin.py.
+
+Requires httpx:
+  pip install httpx
+
+Usage:
+  python scripts/load_schools_pipelined.py
+  python scripts/load_schools_pipelined.py --url http://127.0.0.1:8080 --csv california_schools_complete.csv
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / 'data'
+DEFAULT_CSV = 'us_schools_ceeb_and_federal_codes_template.csv'
+
+TABLE = 'schools'
+SHADOW_TABLE = 'schools_loading'
+OLD_TABLE = 'schools_old'
+
+COLUMNS = [
+    'id', 'school_name', 'school_type', 'city', 'state', 'country',
+    'address', 'zip', 'phone', 'ceeb_code', 'federal_school_code',
+    'website', 'notes', 'search_text', 'created_at',
+]
+
+TABLE_DDL = """
+  CREATE TABLE {table} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    school_name TEXT NOT NULL,
+    school_type TEXT NOT NULL,
+    city TEXT NOT NULL,
+    state TEXT NOT NULL,
+    country TEXT NOT NULL DEFAULT 'USA',
+    address TEXT,
+    zip TEXT,
+    phone TEXT,
+    ceeb_code TEXT,
+    federal_school_code TEXT,
+    website TEXT,
+    notes TEXT,
+    search_text TEXT NOT NULL,
+    created_at INTEGER NOT NULL
+  )
+"""
+
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_schools_search_text ON schools(search_text)',
+    'CREATE INDEX IF NOT EXISTS idx_schools_type ON schools(school_type)',
+    'CREATE INDEX IF NOT EXISTS idx_schools_state ON schools(state)',
+    'CREATE INDEX IF NOT EXISTS idx_schools_ceeb ON schools(ceeb_code)',
+]
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RETRIES = 5
+REQUEST_TIMEOUT = 60.0
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class LibsqlError(Exception):
+    """A statement failed, or the server couldn't be reached after retries"""
+
+
+class LibsqlTransportError(LibsqlError):
+    """The server couldn't be reached (or kept returning 5xx) after retries"""
+
+
+def backoff_delay(attempt):
+    """Exponential backoff with jitter, capped at 30 seconds"""
+    return min(30, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+def load_env_file(env_path):
+    """Load KEY=value lines from .env.local into os.environ (like the JS loaders)"""
+    if not env_path.exists():
+        return
+    for line in env_path.read_text(encoding='utf-8').splitlines():
+        line = line.strip()
+        if not line or line.startswith('#') or '=' not in line:
+            continue
+        key, value = line.split('=', 1)
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+            value = value[1:-1]
+        os.environ[key.strip()] = value
+
+
+def http_url(database_url):
+    """Turn a libsql:// URL into the HTTPS endpoint; http(s) URLs pass through"""
+    if database_url.startswith('libsql://'):
+        return 'https://' + database_url[len('libsql://'):]
+    return database_url
+
+
+def encode_value(value):
+    """Encode a Python value as a Hrana protocol value"""
+    if value is None:
+        return {'type': 'null'}
+    if isinstance(value, bool):
+        return {'type': 'integer', 'value': str(int(value))}
+    if isinstance(value, int):
+        return {'type': 'integer', 'value': str(value)}
+    if isinstance(value, float):
+        return {'type': 'float', 'value': value}
+    return {'type': 'text', 'value': str(value)}
+
+
+def decode_value(value):
+    if value['type'] == 'null':
+        return None
+    if value['type'] == 'integer':
+        return int(value['value'])
+    return value.get('value')
+
+
+def statement(sql, args=()):
+    return {'sql': sql, 'args': [encode_value(a) for a in args]}
+
+
+class LibsqlHttpClient:
+    """Minimal async libSQL client over the Hrana v2 HTTP pipeline endpoint"""
+
+    def __init__(self, url, auth_token=None, max_connections=DEFAULT_CONCURRENCY,
+                 retries=DEFAULT_RETRIES):
+        headers = {'Authorization': f'Bearer {auth_token}'} if auth_token else {}
+        self.retries = retries
+        self._client = httpx.AsyncClient(
+            base_url=http_url(url),
+            headers=headers,
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+        )
+
+    async def close(self):
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _pipeline(self, requests, retries=None):
+        """
+        POST one self-contained pipeline, retrying transport and 5xx failures.
+        Pass retries=0 for pipelines that are not safe to resend.
+        """
+        retries = self.retries if retries is None else retries
+        body = {'baton': None, 'requests': requests + [{'type': 'close'}]}
+        for attempt in range(retries + 1):
+            try:
+                response = await self._client.post('/v2/pipeline', json=body)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.json()['results']
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+            except httpx.HTTPStatusError as e:
+                raise LibsqlError(f"HTTP {e.response.status_code}: {e.response.text[:200]}")
+            if attempt < retries:
+                await asyncio.sleep(backoff_delay(attempt))
+        raise LibsqlTransportError(f"Giving up after {retries + 1} attempts: {error}")
+
+    @staticmethod
+    def _check(result):
+        if result['type'] == 'error':
+            raise LibsqlError(result['error']['message'])
+        return result['response']
+
+    async def execute(self, sql, args=()):
+        """Run one statement; returns (columns, rows)"""
+        results = await self._pipeline([{'type': 'execute', 'stmt': statement(sql, args)}])
+        result = self._check(results[0])['result']
+        columns = [c['name'] for c in result['cols']]
+        rows = [[decode_value(v) for v in row] for row in result['rows']]
+        return columns, rows
+
+    async def transaction(self, statements, retries=None):
+        """
+        Run (sql, args) statements atomically as one Hrana batch. Each step
+        only runs if the previous one succeeded, and a failure rolls back.
+        """
+        steps = [{'stmt': statement('BEGIN IMMEDIATE')}]
+        for sql, args in statements:
+            steps.append({'stmt': statement(sql, args),
+                          'condition': {'type': 'ok', 'step': len(steps) - 1}})
+        steps.append({'stmt': statement('COMMIT'),
+                      'condition': {'type': 'ok', 'step': len(steps) - 1}})
+        steps.append({'stmt': statement('ROLLBACK'),
+                      'condition': {'type': 'not', 'cond': {'type': 'ok', 'step': len(steps) - 1}}})
+
+        results = await self._pipeline([{'type': 'batch', 'batch': {'steps': steps}}], retries)
+        result = self._check(results[0])['result']
+        errors = [e for e in result['step_errors'] if e]
+        if errors:
+            raise LibsqlError(errors[0]['message'])
+        return result['step_results']
+
+
+def read_schools(csv_path, timestamp):
+    """Read the school CSV into row tuples matching COLUMNS"""
+    rows = []
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        for row_number, school in enumerate(csv.DictReader(f)):
+            school = {k: (v or '').strip() for k, v in school.items() if k}
+            name = school.get('School Name', '')
+            if not name:
+                continue
+            search_text = ' '.join(filter(None, [
+                name,
+                school.get('City', ''),
+                school.get('State', ''),
+                school.get('CEEB Code', ''),
+                school.get('Federal School Code', ''),
+            ])).lower()
+            rows.append((
+                row_number + 1,
+                name,
+                school.get('Type', ''),
+                school.get('City', ''),
+                school.get('State', ''),
+                school.get('Country') or 'USA',
+                school.get('Address') or None,
+                school.get('ZIP') or None,
+                school.get('Phone') or None,
+                school.get('CEEB Code') or None,
+                school.get('Federal School Code') or None,
+                school.get('Website') or None,
+                school.get('Notes') or None,
+                search_text,
+                timestamp,
+            ))
+    return rows
+
+
+def insert_statement(batch):
+    placeholders = ', '.join(['(' + ', '.join('?' * len(COLUMNS)) + ')'] * len(batch))
+    sql = f"INSERT OR REPLACE INTO {SHADOW_TABLE} ({', '.join(COLUMNS)}) VALUES {placeholders}"
+    return sql, [value for row in batch for value in row]
+
+
+async def load_batches(client, rows, batch_size, concurrency):
+    """Insert rows into the shadow table with up to `concurrency` batches in flight"""
+    queue = asyncio.Queue()
+    for i in range(0, len(rows), batch_size):
+        queue.put_nowait(rows[i:i + batch_size])
+
+    loaded = 0
+
+    async def worker():
+        nonlocal loaded
+        while True:
+            try:
+                batch = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await client.transaction([insert_statement(batch)])
+            loaded += len(batch)
+            percent = round(loaded / len(rows) * 100)
+            print(f"\r   Progress: {loaded}/{len(rows)} ({percent}%) ", end='', flush=True)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for task in workers:
+            task.cancel()
+        raise
+    print()
+    return loaded
+
+
+async def table_exists(client, table):
+    _, rows = await client.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return bool(rows)
+
+
+async def swap_in_shadow_table(client):
+    """
+    Replace the live table with the shadow table in one transaction. The
+    swap can't be safely resent: if it committed but the response was lost,
+    a resend would fail and roll back. So after any failure, check whether
+    the shadow table is still there before retrying or giving up.
+    """
+    swap = [
+        (TABLE_DDL.format(table=f'IF NOT EXISTS {TABLE}'), ()),
+        (f'DROP TABLE IF EXISTS {OLD_TABLE}', ()),
+        (f'ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}', ()),
+        (f'ALTER TABLE {SHADOW_TABLE} RENAME TO {TABLE}', ()),
+        (f'DROP TABLE {OLD_TABLE}', ()),
+    ] + [(sql, ()) for sql in INDEXES]
+
+    for attempt in range(client.retries + 1):
+        try:
+            await client.transaction(swap, retries=0)
+            return
+        except LibsqlError as e:
+            try:
+                shadow_remains = await table_exists(client, SHADOW_TABLE)
+            except LibsqlError as check_error:
+                raise LibsqlError(f"Swap failed ({e}) and its outcome could not be checked "
+                                  f"({check_error}); see whether {SHADOW_TABLE} still exists")
+            if not shadow_remains:
+                print("   Swap committed (its response was lost)")
+                return
+            if not isinstance(e, LibsqlTransportError) or attempt == client.retries:
+                raise LibsqlError(f"Swap rolled back, live table left untouched: {e}")
+            await asyncio.sleep(backoff_delay(attempt))
+
+
+async def load_schools(url, auth_token, csv_path, batch_size, concurrency, retries,
+                       allow_empty=False):
+    rows = read_schools(csv_path, int(time.time() * 1000))
+
+    # An empty CSV would otherwise pass the row-count check and swap an
+    # empty table in over the live one
+    if not rows and not allow_empty:
+        raise LibsqlError(f"No schools read from {csv_path}; refusing to replace the live "
+                          f"table with an empty one (pass --allow-empty to do it anyway)")
+
+    async with LibsqlHttpClient(url, auth_token, max_connections=concurrency,
+                                retries=retries) as client:
+        try:
+            print(f"1. Preparing shadow table {SHADOW_TABLE}...")
+            await client.transaction([
+                (f'DROP TABLE IF EXISTS {SHADOW_TABLE}', ()),
+                (TABLE_DDL.format(table=SHADOW_TABLE), ()),
+            ])
+
+            print(f"2. Loading {len(rows)} schools ({batch_size} per batch, {concurrency} in flight)...")
+            start = time.perf_counter()
+            loaded = await load_batches(client, rows, batch_size, concurrency)
+            print(f"   Loaded {loaded} rows in {time.perf_counter() - start:.1f}s")
+
+            _, result = await client.execute(f'SELECT COUNT(*) FROM {SHADOW_TABLE}')
+            if result[0][0] != len(rows):
+                raise LibsqlError(f"Shadow table has {result[0][0]} rows, expected {len(rows)}")
+        except LibsqlError as e:
+            raise LibsqlError(f"{e} (live table left untouched)") from e
+
+        print(f"3. Swapping {SHADOW_TABLE} into place...")
+        await swap_in_shadow_table(client)
+
+        _, result = await client.execute(f'SELECT COUNT(*) FROM {TABLE}')
+        return result[0][0]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Load schools into libSQL/Turso with pipelined, transactional batches',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Load the national CSV into DATABASE_URL from .env.local
+  python load_schools_pipelined.py
+
+  # Load into a local sqld or scripts/libsql_http_standin.py
+  python load_schools_pipelined.py --url http://127.0.0.1:8080
+        """
+    )
+
+    parser.add_argument('--csv', default=DEFAULT_CSV,
+                       help='CSV file name in data/, or a path (default: %(default)s)')
+    parser.add_argument('--url', help='Database URL (default: DATABASE_URL)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                       help='Rows per INSERT batch (default: %(default)s)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                       help='Batches in flight (default: %(default)s)')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                       help='Retries per request on network/5xx errors (default: %(default)s)')
+    parser.add_argument('--allow-empty', action='store_true',
+                       help='Swap in the new table even if the CSV has no schools')
+
+    args = parser.parse_args()
+
+    if args.batch_size < 1 or args.concurrency < 1 or args.retries < 0:
+        print("❌ --batch-size and --concurrency must be at least 1, --retries at least 0")
+        return 1
+
+    load_env_file(PROJECT_ROOT / '.env.local')
+    url = args.url or os.environ.get('DATABASE_URL')
+    if not url or url.startswith('file:'):
+        print("❌ Set DATABASE_URL (or --url) to a libsql:// or http(s):// database")
+        return 1
+
+    csv_path = Path(args.csv)
+    if not csv_path.exists():
+        csv_path = DATA_DIR / args.csv
+    if not csv_path.exists():
+        print(f"❌ File not found: {args.csv}")
+        return 1
+
+    print("🏫 Pipelined School Loader")
+    print("=" * 60)
+    print(f"Database: {url[:40]}...")
+    print(f"Input: {csv_path}")
+    print()
+
+    try:
+        total = asyncio.run(load_schools(url, os.environ.get('TURSO_AUTH_TOKEN'), csv_path,
+                                         args.batch_size, args.concurrency, args.retries,
+                                         args.allow_empty))
+    except LibsqlError as e:
+        print(f"\n❌ Load failed: {e}")
+        return 1
+
+    print(f"\n✅ Schools table swapped in: {total} schools")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
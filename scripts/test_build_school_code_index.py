@@ -0,0 +1,44 @@
+import csv
+
+from build_school_code_index import (
+    SchoolCodeIndex, build_index, iter_csv_rows, read_school_row, write_index,
+)
+
+CSV_TEXT = (
+    'School Name,CEEB Code,Federal School Code\n'
+    '"Multi\nline",1234,\n'
+    'B,5678,G21223\n'
+)
+
+
+def test_quoted_newline_stays_in_one_record(tmp_path):
+    schools_csv = tmp_path / 'schools.csv'
+    schools_csv.write_bytes(CSV_TEXT.encode('utf-8'))
+
+    rows = list(iter_csv_rows(schools_csv))
+    with open(schools_csv, newline='', encoding='utf-8') as f:
+        expected = list(csv.DictReader(f))
+
+    assert [row for _, _, row in rows] == expected
+    assert [row_number for row_number, _, _ in rows] == [0, 1]
+
+    index_file = tmp_path / 'codes.idx'
+    write_index(build_index(schools_csv), index_file)
+    with SchoolCodeIndex(index_file) as index:
+        (_, row_number, offset), = index.lookup('1234')
+        assert row_number == 0
+        assert read_school_row(schools_csv, offset)['School Name'] == 'Multi\nline'
+
+        (_, row_number, offset), = index.lookup('g21223')
+        assert row_number == 1
+        assert read_school_row(schools_csv, offset)['School Name'] == 'B'
+
+
+def test_normalize_code_undoes_pandas_floats():
+    from build_school_code_index import normalize_code
+
+    assert normalize_code('1131.0') == '001131'
+    assert normalize_code(1131.0) == '001131'
+    assert normalize_code('nan') == ''
+    assert normalize_code(' g21223 ') == 'G21223'
+    assert normalize_code('052460') == '052460'
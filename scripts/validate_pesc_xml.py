@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+PESC XML Batch Validator
+Checks outgoing TranscriptRequest documents (as produced by
+src/lib/pesc-xml-generator.ts) before they are sent to Parchment.
+
+Inputs can be single XML files, directories (searched recursively) or
+.zip / .tar / .tar.gz archives of generated XML. Each document is parsed
+incrementally with iterparse and elements are cleared as soon as they are
+checked, and documents are spread across a process pool with a bounded
+number in flight, so memory stays flat however large the batch is.
+
+Checks:
+- Root element is TranscriptRequest in the PESC v1.2.0 namespace
+  (same as PARCHMENT_SAMPLE_XML.xml)
+- Required elements are present and non-empty
+- TransmissionData comes before Request, and no unexpected top-level elements
+- CEEB/ACT and federal codes are well formed and known in the school dataset
+
+Usage:
+  python scripts/validate_pesc_xml.py outgoing/2025-11-20/
+  python scripts/validate_pesc_xml.py batch.zip --workers 8
+"""
+
+import argparse
+import csv
+import os
+import re
+import sys
+import tarfile
+import zipfile
+import zlib
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from io import BytesIO
+from pathlib import Path
+
+from build_school_code_index import normalize_code
+
+PESC_NAMESPACE = 'urn:org:pesc:message:TranscriptRequest:v1.2.0'
+ROOT_ELEMENT = 'TranscriptRequest'
+
+DEFAULT_SCHOOLS_CSV = Path(__file__).parent.parent / 'data' / 'us_schools_ceeb_and_federal_codes_template.csv'
+
+# Paths are relative to the root element, with namespace prefixes stripped
+REQUIRED_PATHS = [
+    'TransmissionData/DocumentID',
+    'TransmissionData/CreatedDateTime',
+    'TransmissionData/DocumentTypeCode',
+    'TransmissionData/TransmissionType',
+    'TransmissionData/Source/Organization/CEEBACT',
+    'TransmissionData/Source/Organization/OrganizationName',
+    'TransmissionData/Destination/Organization/CEEBACT',
+    'TransmissionData/Destination/Organization/OrganizationName',
+    'TransmissionData/RequestTrackingID',
+    'Request/CreatedDateTime',
+    'Request/RequestedStudent/Person/Birth/BirthDate',
+    'Request/RequestedStudent/Person/Name/FirstName',
+    'Request/RequestedStudent/Person/Name/LastName',
+    'Request/RequestedStudent/Person/Contacts/Email/EmailAddress',
+    'Request/RequestedStudent/Attendance/School/OrganizationName',
+    'Request/RequestedStudent/Attendance/School/CEEBACT',
+    'Request/RequestedStudent/ReleaseAuthorizedIndicator',
+]
+
+TOP_LEVEL_ORDER = ['TransmissionData', 'Request']
+
+# Elements holding institution codes (CEEB is used in the Parchment sample),
+# with the format each must have. CEEB/ACT codes are numeric; federal school
+# codes are a digit or letter followed by five digits (e.g. 001312, G21223)
+CODE_PATTERNS = {
+    'CEEBACT': re.compile(r'^\d{4,6}$'),
+    'CEEB': re.compile(r'^\d{4,6}$'),
+    'FederalSchoolCode': re.compile(r'^[0-9A-Z]\d{5}$'),
+}
+
+# The generator writes this when the student's school had no CEEB code
+UNKNOWN_CODE = 'unknown'
+
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+DATETIME_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:\d{2})?$')
+
+XML_SUFFIXES = ('.xml',)
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz')
+
+# How many documents each worker may have queued before we stop submitting
+IN_FLIGHT_PER_WORKER = 16
+
+# Loaded once per worker process by _init_worker
+_known_codes = None
+
+
+def load_school_codes(schools_csv):
+    """Load the set of normalized CEEB and federal codes from the school CSV"""
+    codes = set()
+    with open(schools_csv, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            for column in ('CEEB Code', 'Federal School Code'):
+                code = normalize_code(row.get(column))
+                if code:
+                    codes.add(code)
+    return codes
+
+
+def _init_worker(schools_csv):
+    global _known_codes
+    _known_codes = load_school_codes(schools_csv) if schools_csv else None
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _namespace(tag):
+    return tag[1:].split('}', 1)[0] if tag.startswith('{') else ''
+
+
+def check_code(path, name, value, issues):
+    """Check a single institution code held in element `name`, appending to issues"""
+    if value == UNKNOWN_CODE:
+        issues.append(('warning', f"{path}: school code is 'unknown' (manual processing)"))
+        return
+    if not CODE_PATTERNS[name].match(value):
+        issues.append(('error', f"{path}: malformed code '{value}'"))
+        return
+    if _known_codes is not None and normalize_code(value) not in _known_codes:
+        issues.append(('warning', f"{path}: code {value} not found in school dataset"))
+
+
+def validate_document(source):
+    """
+    Validate one document. `source` is a file path or an in-memory file.
+    Returns a list of (severity, message) tuples.
+    """
+    issues = []
+    seen = set()
+    top_level = []
+    stack = []
+    root = None
+
+    try:
+        for event, elem in ET.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                stack.append(_local_name(elem.tag))
+                if root is None:
+                    root = elem
+                    if stack[0] != ROOT_ELEMENT or _namespace(elem.tag) != PESC_NAMESPACE:
+                        issues.append(('error', f"root element is {elem.tag}, expected {{{PESC_NAMESPACE}}}{ROOT_ELEMENT}"))
+                elif len(stack) == 2:
+                    top_level.append(stack[1])
+                continue
+
+            path = '/'.join(stack[1:])
+            name = stack.pop()
+            text = (elem.text or '').strip()
+
+            if path in REQUIRED_PATHS:
+                seen.add(path)
+                if not text:
+                    issues.append(('error', f"{path}: empty value"))
+
+            if name in CODE_PATTERNS and text:
+                check_code(path, name, text, issues)
+            elif name == 'BirthDate' and text and not DATE_PATTERN.match(text):
+                issues.append(('error', f"{path}: '{text}' is not YYYY-MM-DD"))
+            elif name == 'CreatedDateTime' and text and not DATETIME_PATTERN.match(text):
+                issues.append(('error', f"{path}: '{text}' is not an ISO 8601 timestamp"))
+            elif path == 'TransmissionData/DocumentTypeCode' and text and text != 'Request':
+                issues.append(('error', f"{path}: expected 'Request', got '{text}'"))
+
+            # Drop the subtree we just checked; top-level elements are also
+            # detached from the root so nothing accumulates
+            elem.clear()
+            if len(stack) == 1:
+                root.clear()
+    except ET.ParseError as e:
+        return [('error', f"XML parse error: {e}")]
+    except OSError as e:
+        return [('error', f"Could not read document: {e}")]
+
+    for path in REQUIRED_PATHS:
+        if path not in seen:
+            issues.append(('error', f"{path}: missing required element"))
+
+    unexpected = [name for name in top_level if name not in TOP_LEVEL_ORDER]
+    for name in unexpected:
+        issues.append(('error', f"unexpected top-level element <{name}>"))
+    expected_order = [name for name in top_level if name in TOP_LEVEL_ORDER]
+    if expected_order != sorted(expected_order, key=TOP_LEVEL_ORDER.index):
+        issues.append(('error', f"top-level elements out of order: {', '.join(expected_order)}"))
+
+    return issues
+
+
+def _validate_task(task):
+    label, path, data, _ = task
+    source = BytesIO(data) if data is not None else path
+    return label, validate_document(source)
+
+
+def iter_documents(inputs):
+    """
+    Yield (label, path, data, error) tasks. Plain files are passed by path so
+    the worker reads them; archive members are read here, one at a time.
+    `error` is set instead when an archive or member could not be read.
+    """
+    for item in inputs:
+        item = Path(item)
+        if item.is_dir():
+            for root, _, files in os.walk(item):
+                for name in sorted(files):
+                    path = Path(root) / name
+                    if name.lower().endswith(XML_SUFFIXES):
+                        yield str(path), str(path), None, None
+                    elif name.lower().endswith(ARCHIVE_SUFFIXES):
+                        yield from iter_archive(path)
+        elif item.name.lower().endswith(ARCHIVE_SUFFIXES):
+            yield from iter_archive(item)
+        else:
+            yield str(item), str(item), None, None
+
+
+def iter_archive(path):
+    """Yield tasks for each XML member of a zip or tar archive"""
+    try:
+        if path.name.lower().endswith('.zip'):
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    if info.is_dir() or not info.filename.lower().endswith(XML_SUFFIXES):
+                        continue
+                    label = f"{path}:{info.filename}"
+                    # A bad member (e.g. CRC mismatch) doesn't stop the rest
+                    try:
+                        data = archive.read(info)
+                    except (OSError, zipfile.BadZipFile, zlib.error) as e:
+                        yield label, None, None, f"Could not read archive member: {e}"
+                        continue
+                    yield label, None, data, None
+        else:
+            # Stream mode so compressed tarballs are read front to back once
+            with tarfile.open(path, 'r|*') as archive:
+                for member in archive:
+                    if member.isfile() and member.name.lower().endswith(XML_SUFFIXES):
+                        yield f"{path}:{member.name}", None, archive.extractfile(member).read(), None
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError, zlib.error) as e:
+        yield str(path), None, None, f"Could not read archive: {e}"
+
+
+def run_batch(inputs, schools_csv, workers, show_warnings):
+    """Validate every document, printing failures as they come in"""
+    totals = {'documents': 0, 'passed': 0, 'failed': 0, 'warnings': 0}
+    max_in_flight = workers * IN_FLIGHT_PER_WORKER
+
+    def report(label, issues):
+        errors = [m for severity, m in issues if severity == 'error']
+        warnings = [m for severity, m in issues if severity == 'warning']
+        totals['documents'] += 1
+        totals['warnings'] += len(warnings)
+        if errors:
+            totals['failed'] += 1
+            print(f"❌ {label}")
+            for message in errors:
+                print(f"   {message}")
+        else:
+            totals['passed'] += 1
+        if show_warnings:
+            for message in warnings:
+                print(f"⚠️  {label}: {message}")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(schools_csv,)) as pool:
+        pending = set()
+        for task in iter_documents(inputs):
+            label, _, _, error = task
+            if error:
+                report(label, [('error', error)])
+                continue
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    report(*future.result())
+            pending.add(pool.submit(_validate_task, task))
+        for future in pending:
+            report(*future.result())
+
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Validate outgoing PESC TranscriptRequest XML in bulk',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Validate a day's output directory
+  python validate_pesc_xml.py outgoing/2025-11-20/
+
+  # Validate archives on 8 cores, showing warnings
+  python validate_pesc_xml.py batch1.zip batch2.tar.gz --workers 8 --warnings
+        """
+    )
+
+    parser.add_argument('inputs', nargs='+', metavar='PATH',
+                       help='XML files, directories or .zip/.tar(.gz) archives')
+    parser.add_argument('--schools', metavar='CSV_PATH', default=str(DEFAULT_SCHOOLS_CSV),
+                       help='School dataset used to check CEEB/federal codes')
+    parser.add_argument('--no-code-check', action='store_true',
+                       help='Skip checking codes against the school dataset')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                       help='Number of worker processes (default: all cores)')
+    parser.add_argument('--warnings', action='store_true',
+                       help='Print warnings as well as errors')
+
+    args = parser.parse_args()
+
+    schools_csv = None if args.no_code_check else args.schools
+    if schools_csv and not os.path.exists(schools_csv):
+        print(f"❌ School dataset not found: {schools_csv}")
+        return 1
+
+    print("📋 PESC XML Batch Validator")
+    print("=" * 60)
+
+    totals = run_batch(args.inputs, schools_csv, max(1, args.workers), args.warnings)
+
+    print()
+    print(f"Documents checked: {totals['documents']}")
+    print(f"✅ Passed: {totals['passed']}")
+    print(f"❌ Failed: {totals['failed']}")
+    print(f"⚠️  Warnings: {totals['warnings']}")
+
+    return 1 if totals['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())